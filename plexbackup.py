@@ -1,16 +1,68 @@
 import argparse
+import collections
+import io
+import itertools
+import mmap
 import os
+import queue
 import subprocess
 import datetime
 import shutil
+import tarfile
+import tempfile
+import threading
+import time
 import zipfile
+import zlib
 import py7zr
+import py7zr.callbacks
+import pyzstd
 import patoolib
+import psutil
+import pywintypes
+import win32serviceutil
 import winreg
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from tqdm import tqdm
 import yaml
 
+# Prefer the LibYAML C parser when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+# Use the SIMD-accelerated DEFLATE from python-isal when available; it produces
+# standard zlib/deflate streams so the archives stay plain zips.
+try:
+    from isal import isal_zlib as _deflate_backend
+except ImportError:
+    _deflate_backend = zlib
+
+# CRC-32 over the original bytes: isal's PCLMUL-accelerated crc32 computes
+# the same IEEE polynomial the zip format mandates and accepts buffer
+# objects, so the mmap chunk loops can use it directly.
+_crc32 = _deflate_backend.crc32
+
+# Files at least this large are memory-mapped and compressed in chunks;
+# below it the mmap setup overhead dominates and a plain read wins
+_MMAP_THRESHOLD = 64 * 1024
+_STREAM_CHUNK = 1024 * 1024
+
+# Compressible files at least this large are deflated in the writer thread,
+# streaming straight into the archive, so multi-GB payloads never sit whole
+# in a worker or cross the process boundary
+_LARGE_FILE_THRESHOLD = 64 * 1024 * 1024
+
+# Already entropy-coded content: deflating these burns CPU for <1% gain,
+# so they are stored uncompressed in zip archives
+_INCOMPRESSIBLE = frozenset({
+    '.jpg', '.jpeg', '.png', '.webp', '.gif',
+    '.mp4', '.mkv', '.m4v', '.mp3', '.m4a', '.flac',
+    '.zip', '.7z', '.gz', '.xz', '.zst', '.br',
+})
+
 # Setup logging
 def setup_logging():
     log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
@@ -27,7 +79,7 @@ def setup_logging():
 def read_config(config_path):
     try:
         with open(config_path, 'r') as file:
-            config = yaml.safe_load(file)
+            config = yaml.load(file, Loader=_YamlLoader)
         return config
     except yaml.YAMLError as e:
         logging.error(f"Error reading configuration file: {e}")
@@ -42,18 +94,29 @@ def stop_plex_services():
     for service in services:
         try:
             logging.debug(f"Attempting to stop service: {service}")
-            result = subprocess.run(["sc", "stop", service], check=True, capture_output=True, text=True)
-            logging.info(f"Stopped service {service}: {result.stdout}")
-        except subprocess.CalledProcessError as e:
-            if "1060" in str(e):
-                logging.info(f"Service {service} does not exist, skipping. Error: {e.stderr}")
+            win32serviceutil.StopService(service)
+            logging.info(f"Stopped service {service}")
+        except pywintypes.error as e:
+            if e.winerror == 1060:
+                logging.info(f"Service {service} does not exist, skipping.")
+            elif e.winerror == 1062:
+                logging.info(f"Service {service} is not running, skipping.")
             else:
-                logging.warning(f"Error stopping service {service}: {e.stderr}")
-    try:
-        result = subprocess.run(["taskkill", "/F", "/IM", "Plex Media Server.exe"], check=True, capture_output=True, text=True)
-        logging.info(f"Killed Plex Media Server process: {result.stdout}")
-    except subprocess.CalledProcessError as e:
-        logging.warning(f"Error killing Plex Media Server process: {e.stderr}")
+                logging.warning(f"Error stopping service {service}: {e.strerror}")
+    # Kill any remaining Plex Media Server processes in-process via psutil
+    plex_procs = []
+    for proc in psutil.process_iter(['name']):
+        if proc.info['name'] == "Plex Media Server.exe":
+            try:
+                proc.kill()
+                plex_procs.append(proc)
+            except psutil.NoSuchProcess:
+                pass
+            except psutil.AccessDenied:
+                logging.warning(f"Access denied killing Plex Media Server process (pid {proc.pid})")
+    if plex_procs:
+        psutil.wait_procs(plex_procs, timeout=5)
+        logging.info("Killed Plex Media Server process")
 
 # Start Plex services
 def start_plex_services():
@@ -61,13 +124,15 @@ def start_plex_services():
     for service in services:
         try:
             logging.debug(f"Attempting to start service: {service}")
-            result = subprocess.run(["sc", "start", service], check=True, capture_output=True, text=True)
-            logging.info(f"Started service {service}: {result.stdout}")
-        except subprocess.CalledProcessError as e:
-            if "1060" in str(e):
-                logging.info(f"Service {service} does not exist, skipping. Error: {e.stderr}")
+            win32serviceutil.StartService(service)
+            logging.info(f"Started service {service}")
+        except pywintypes.error as e:
+            if e.winerror == 1060:
+                logging.info(f"Service {service} does not exist, skipping.")
+            elif e.winerror == 1056:
+                logging.info(f"Service {service} is already running, skipping.")
             else:
-                logging.warning(f"Error starting service {service}: {e.stderr}")
+                logging.warning(f"Error starting service {service}: {e.strerror}")
 
 # Get Plex installation path from the registry
 def get_plex_install_path():
@@ -79,71 +144,421 @@ def get_plex_install_path():
         logging.error("Plex install path not found in registry.")
         raise FileNotFoundError("Plex install path not found in registry.")
 
-# Backup Plex registry entries
-def backup_registry(backup_zip):
+# Export the Plex registry key and return the .reg payload as bytes.
+# reg.exe cannot write to stdout, so export to a temp file outside the CWD
+# and always clean it up.
+def _reg_export_bytes():
+    tmp = tempfile.NamedTemporaryFile(suffix='.reg', delete=False)
+    tmp.close()
+    try:
+        subprocess.run(["reg", "export", r"HKEY_CURRENT_USER\SOFTWARE\Plex, Inc.\Plex Media Server", tmp.name, "/y"], check=True)
+        with open(tmp.name, 'rb') as f:
+            return f.read()
+    finally:
+        os.unlink(tmp.name)
+
+# Append (name, bytes) sidecar members to a zip in one session. Reopening
+# in append mode re-parses and rewrites the central directory, so every
+# sidecar must share a single open/close cycle.
+def _append_zip_members(backup_zip, members):
+    with zipfile.ZipFile(backup_zip, 'a', allowZip64=True) as zipf:
+        for name, blob in members:
+            zipf.writestr(name, blob)
+
+# Backup Plex registry entries. When zfh is an open ZipFile the sidecar is
+# written into it directly, skipping a close/reopen of the archive.
+def backup_registry(backup_zip, format='zip', zfh=None):
     registry_backup_file = "plex_registry_backup.reg"
-    subprocess.run(["reg", "export", r"HKEY_CURRENT_USER\SOFTWARE\Plex, Inc.\Plex Media Server", registry_backup_file], check=True)
-    with zipfile.ZipFile(backup_zip, 'a') as zipf:
-        zipf.write(registry_backup_file, arcname=registry_backup_file)
-    os.remove(registry_backup_file)
+    reg_bytes = _reg_export_bytes()
+    if zfh is not None:
+        zfh.writestr(registry_backup_file, reg_bytes)
+    elif format == 'zst':
+        # append the sidecar as an extra zstd frame holding a one-member tar
+        with pyzstd.ZstdFile(backup_zip, 'a') as zstd_writer:
+            with tarfile.open(fileobj=zstd_writer, mode='w|') as tar:
+                info = tarfile.TarInfo(registry_backup_file)
+                info.size = len(reg_bytes)
+                info.mtime = int(time.time())
+                tar.addfile(info, io.BytesIO(reg_bytes))
+    elif format == '7z':
+        with py7zr.SevenZipFile(backup_zip, 'a') as archive:
+            archive.writestr(reg_bytes, registry_backup_file)
+    else:
+        _append_zip_members(backup_zip, [(registry_backup_file, reg_bytes)])
     logging.info(f"Registry backed up to {backup_zip}")
 
-# Compress directory to various archive formats
-def compress_directory(src_dir, archive_path, format='zip', compression_level=5, exclude_folders=[]):
-    total_files = sum([len(files) for r, d, files in os.walk(src_dir) if os.path.basename(r) not in exclude_folders])
+# Walk src_dir with os.scandir, yielding (path, arcname, size) for every file.
+# DirEntry caches the stat results from the directory scan, so no extra
+# stat() syscalls fire per entry on Windows.
+def _iter_files(src_dir, exclude_folders):
+    # O(1) membership checks, case-insensitive to match Windows paths
+    excluded = frozenset(folder.lower() for folder in exclude_folders or ())
+    src_root = os.path.abspath(src_dir)
+    # arcnames are the entry path with the root prefix sliced off; one
+    # precomputed length replaces an os.path.relpath call per file
+    strip = len(src_root.rstrip(os.sep)) + 1
+    stack = [src_root]
+    while stack:
+        current = stack.pop()
+        with os.scandir(current) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name.lower() not in excluded:
+                        stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry.path, entry.path[strip:], entry.stat(follow_symlinks=False).st_size
+
+# Deflate a buffer to a raw DEFLATE stream using the fastest available backend
+def _deflate_bytes(data, level):
+    level = min(level, _deflate_backend.Z_BEST_COMPRESSION)
+    compressor = _deflate_backend.compressobj(level, _deflate_backend.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush()
+
+# Compress a single file, returning (payload, crc32, uncompressed size,
+# zip compress type). Files with incompressible extensions are returned raw
+# and marked ZIP_STORED. Large files are memory-mapped so the C compressor
+# consumes the page cache directly in 1 MiB slices, without a Python-level
+# read loop copying buffers.
+def _compress_file(file_path, level):
+    store = os.path.splitext(file_path)[1].lower() in _INCOMPRESSIBLE
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if store:
+            if size >= _MMAP_THRESHOLD:
+                # CRC over an mmap view only; a None payload tells the writer
+                # to copy the file into the archive itself (sendfile path)
+                crc = 0
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    with memoryview(mm) as view:
+                        for offset in range(0, size, _STREAM_CHUNK):
+                            with view[offset:offset + _STREAM_CHUNK] as chunk:
+                                crc = _crc32(chunk, crc)
+                return None, crc, size, zipfile.ZIP_STORED
+            data = f.read()
+            return data, _crc32(data), size, zipfile.ZIP_STORED
+        if size >= _MMAP_THRESHOLD:
+            clevel = min(level, _deflate_backend.Z_BEST_COMPRESSION)
+            compressor = _deflate_backend.compressobj(clevel, _deflate_backend.DEFLATED, -15)
+            crc = 0
+            parts = []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                with memoryview(mm) as view:
+                    for offset in range(0, size, _STREAM_CHUNK):
+                        with view[offset:offset + _STREAM_CHUNK] as chunk:
+                            crc = _crc32(chunk, crc)
+                            parts.append(compressor.compress(chunk))
+            parts.append(compressor.flush())
+            return b''.join(parts), crc, size, zipfile.ZIP_DEFLATED
+        data = f.read()
+    return _deflate_bytes(data, level), _crc32(data), size, zipfile.ZIP_DEFLATED
+
+# Write a pre-compressed DEFLATE payload into an open ZipFile.
+# zinfo must already carry CRC, compress_size and file_size.
+def _write_precompressed(zipf, zinfo, payload):
+    zinfo.header_offset = zipf.fp.tell()
+    zipf._writecheck(zinfo)
+    zipf._didModify = True
+    zip64 = zinfo.file_size > zipfile.ZIP64_LIMIT or zinfo.compress_size > zipfile.ZIP64_LIMIT
+    zipf.fp.write(zinfo.FileHeader(zip64))
+    zipf.fp.write(payload)
+    zipf.start_dir = zipf.fp.tell()
+    zipf.filelist.append(zinfo)
+    zipf.NameToInfo[zinfo.filename] = zinfo
+
+# Copy size bytes from src into the dst stream, using os.sendfile for a
+# zero-copy kernel-side transfer where the platform supports it (Windows
+# does not, and falls back to a buffered copy through the page cache).
+def _copy_into(dst, src, size):
+    offset = 0
+    if hasattr(os, 'sendfile'):
+        dst.flush()
+        try:
+            while offset < size:
+                sent = os.sendfile(dst.fileno(), src.fileno(), offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+        except OSError:
+            pass
+    if offset < size:
+        src.seek(offset)
+        shutil.copyfileobj(src, dst, length=_STREAM_CHUNK)
+
+# Write a ZIP_STORED entry by copying the source file straight into the open
+# ZipFile. zinfo must already carry CRC, compress_size and file_size.
+def _write_stored_file(zipf, zinfo, file_path):
+    zinfo.header_offset = zipf.fp.tell()
+    zipf._writecheck(zinfo)
+    zipf._didModify = True
+    zip64 = zinfo.file_size > zipfile.ZIP64_LIMIT
+    zipf.fp.write(zinfo.FileHeader(zip64))
+    with open(file_path, 'rb') as src:
+        _copy_into(zipf.fp, src, zinfo.file_size)
+    zipf.start_dir = zipf.fp.tell()
+    zipf.filelist.append(zinfo)
+    zipf.NameToInfo[zinfo.filename] = zinfo
+
+# Deflate an over-threshold file directly into the open ZipFile in chunks.
+# zipfile's own writer computes the CRC and sizes as it streams, so neither
+# the raw nor the compressed bytes are ever held (or pickled) whole.
+def _write_deflated_stream(zipf, file_path, arcname, level):
+    zinfo = zipfile.ZipInfo.from_file(file_path, arcname)
+    zinfo.compress_type = zipfile.ZIP_DEFLATED
+    zinfo._compresslevel = level
+    with open(file_path, 'rb') as src:
+        with zipf.open(zinfo, 'w', force_zip64=True) as dst:
+            shutil.copyfileobj(src, dst, length=_STREAM_CHUNK)
+
+# Writer thread target: drain compressed entries from the queue and append
+# them to the zip, so archive writes overlap with the compression workers.
+# A None item ends the loop; after a failure the queue is drained without
+# writing so the producer never blocks on a full queue.
+def _zip_writer(zipf, jobs, pbar, errors, compression_level):
+    while True:
+        item = jobs.get()
+        if item is None:
+            return
+        if errors:
+            continue
+        file_path, arcname, payload, crc, size, compress_type = item
+        try:
+            if payload is None and compress_type == zipfile.ZIP_DEFLATED:
+                # over-threshold compressible file: stream-deflate in place
+                _write_deflated_stream(zipf, file_path, arcname, compression_level)
+            else:
+                zinfo = zipfile.ZipInfo.from_file(file_path, arcname)
+                zinfo.compress_type = compress_type
+                zinfo.CRC = crc
+                zinfo.file_size = size
+                if payload is None:
+                    zinfo.compress_size = size
+                    _write_stored_file(zipf, zinfo, file_path)
+                else:
+                    zinfo.compress_size = len(payload)
+                    _write_precompressed(zipf, zinfo, payload)
+            pbar.update(size)
+        except Exception as e:
+            errors.append(e)
+
+# Compress one shard's (file_path, arcname) entries into a standalone .7z;
+# runs on a worker process so each shard gets its own LZMA2 compressor
+def _compress_7z_shard(entries, shard_path, compression_level):
+    with py7zr.SevenZipFile(shard_path, 'w', filters=[{"id": py7zr.FILTER_LZMA2, "preset": compression_level}]) as archive:
+        for file_path, arcname in entries:
+            archive.write(file_path, arcname)
+    return shard_path
+
+# Compress a directory tree into an already-open ZipFile
+def _compress_zip(src_dir, zipf, compression_level, exclude_folders):
+    entries = list(_iter_files(src_dir, exclude_folders))
+    total_bytes = sum(size for file_path, arcname, size in entries)
+    workers = os.cpu_count() or 1
+    # Submit at most 2x workers at a time. Executor.map queues every file up
+    # front, so finished payloads pile up in parent memory whenever the
+    # writer can't keep pace with the compressors; a sliding window keeps
+    # the workers fed while bounding in-flight results.
+    max_inflight = workers * 2
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        with tqdm(total=total_bytes, unit='B', unit_scale=True, unit_divisor=1024, mininterval=0.25, smoothing=0.1, desc="Compressing Backup") as pbar:
+            jobs = queue.Queue(maxsize=8)
+            errors = []
+            writer = threading.Thread(target=_zip_writer, args=(zipf, jobs, pbar, errors, compression_level))
+            writer.start()
+
+            # Over-threshold compressible files skip the pool (a None future)
+            # and are stream-deflated by the writer; everything else is
+            # compressed on the workers.
+            def schedule(entry):
+                file_path, arcname, size = entry
+                if size >= _LARGE_FILE_THRESHOLD and os.path.splitext(file_path)[1].lower() not in _INCOMPRESSIBLE:
+                    pending.append((entry, None))
+                else:
+                    pending.append((entry, executor.submit(_compress_file, file_path, compression_level)))
+
+            try:
+                remaining = iter(entries)
+                pending = collections.deque()
+                for entry in itertools.islice(remaining, max_inflight):
+                    schedule(entry)
+                while pending:
+                    (file_path, arcname, fsize), future = pending.popleft()
+                    if future is None:
+                        jobs.put((file_path, arcname, None, None, fsize, zipfile.ZIP_DEFLATED))
+                    else:
+                        payload, crc, size, compress_type = future.result()
+                        jobs.put((file_path, arcname, payload, crc, size, compress_type))
+                    entry = next(remaining, None)
+                    if entry is not None:
+                        schedule(entry)
+            finally:
+                jobs.put(None)
+                writer.join()
+            if errors:
+                raise errors[0]
+
+# Compress directory to various archive formats.
+# For zip, an already-open ZipFile can be passed as zfh so the caller can
+# keep appending (e.g. the registry sidecar) without closing and re-parsing
+# the central directory of a multi-GB archive.
+def compress_directory(src_dir, archive_path, format='zip', compression_level=5, exclude_folders=[], zfh=None):
     if format == 'zip':
-        with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            with tqdm(total=total_files, desc="Compressing Backup") as pbar:
-                for root, dirs, files in os.walk(src_dir):
-                    dirs[:] = [d for d in dirs if d not in exclude_folders]
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        arcname = os.path.relpath(file_path, src_dir)
-                        zipf.write(file_path, arcname, compress_type=zipfile.ZIP_DEFLATED, compresslevel=compression_level)
-                        pbar.update(1)
+        if zfh is not None:
+            _compress_zip(src_dir, zfh, compression_level, exclude_folders)
+        else:
+            with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_STORED) as zipf:
+                _compress_zip(src_dir, zipf, compression_level, exclude_folders)
+    elif format == 'zst':
+        option = {
+            pyzstd.CParameter.compressionLevel: compression_level,
+            pyzstd.CParameter.nbWorkers: os.cpu_count(),
+            pyzstd.CParameter.checksumFlag: 1,
+        }
+        with pyzstd.ZstdFile(archive_path, 'w', level_or_option=option) as zstd_writer:
+            with tarfile.open(fileobj=zstd_writer, mode='w|') as tar:
+                with tqdm(unit='B', unit_scale=True, unit_divisor=1024, mininterval=0.25, smoothing=0.1, desc="Compressing Backup") as pbar:
+                    for file_path, arcname, size in _iter_files(src_dir, exclude_folders):
+                        tar.add(file_path, arcname=arcname, recursive=False)
+                        pbar.update(size)
     elif format == '7z':
-        with py7zr.SevenZipFile(archive_path, 'w', filters=[{"id": py7zr.FILTER_LZMA2, "preset": compression_level}]) as archive:
-            with tqdm(total=total_files, desc="Compressing Backup") as pbar:
-                for root, dirs, files in os.walk(src_dir):
-                    dirs[:] = [d for d in dirs if d not in exclude_folders]
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        arcname = os.path.relpath(file_path, src_dir)
-                        archive.write(file_path, arcname)
-                        pbar.update(1)
+        seven_zip = shutil.which('7z') or shutil.which('7za')
+        if seven_zip:
+            # The 7z CLI parallelizes LZMA2 across cores when solid mode is
+            # off (-ms=off); py7zr is single-threaded, so prefer the CLI.
+            cmd = [
+                seven_zip, 'a', '-t7z', '-m0=lzma2',
+                f'-mx={compression_level}', f'-mmt={os.cpu_count()}',
+                '-ms=off', '-bso0', os.path.abspath(archive_path), '.',
+            ]
+            cmd += [f'-xr!{folder}' for folder in exclude_folders]
+            subprocess.run(cmd, check=True, cwd=src_dir)
+        else:
+            # py7zr is single-threaded per archive, so shard by top-level
+            # directory, compress the shards on worker processes, and wrap
+            # the finished shards in the final archive with the copy filter
+            shards = {}
+            for file_path, arcname, size in _iter_files(src_dir, exclude_folders):
+                top = arcname.split(os.sep, 1)[0] if os.sep in arcname else ''
+                shards.setdefault(top, []).append((file_path, arcname))
+            entry_lists = list(shards.values())
+            with tempfile.TemporaryDirectory() as shard_dir:
+                shard_paths = [os.path.join(shard_dir, f'_shard_{i:03d}.7z') for i in range(len(entry_lists))]
+                with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+                    results = executor.map(_compress_7z_shard, entry_lists, shard_paths, itertools.repeat(compression_level))
+                    with tqdm(total=len(entry_lists), unit='shard', desc="Compressing Backup", mininterval=0.25) as pbar:
+                        for _ in results:
+                            pbar.update(1)
+                with py7zr.SevenZipFile(archive_path, 'w', filters=[{"id": py7zr.FILTER_COPY}]) as archive:
+                    for shard_path in shard_paths:
+                        archive.write(shard_path, os.path.basename(shard_path))
     else:
-        temp_folder = os.path.join(os.path.dirname(archive_path), "temp_backup_folder")
-        os.makedirs(temp_folder, exist_ok=True)
-        shutil.copytree(src_dir, temp_folder, dirs_exist_ok=True)
-        patoolib.create_archive(archive_path, (temp_folder,), verbosity=1)
-        shutil.rmtree(temp_folder)
+        patoolib.create_archive(archive_path, (src_dir,), verbosity=0)
     logging.info(f"Compressed {src_dir} to {archive_path} in {format} format")
 
+# Adapt py7zr's extraction callback API to a tqdm bar, ticking once per
+# extracted member
+class _ExtractProgress(py7zr.callbacks.ExtractCallback):
+    def __init__(self, pbar):
+        self.pbar = pbar
+
+    def report_start_preparation(self):
+        pass
+
+    def report_start(self, processing_file_path, processing_bytes):
+        pass
+
+    def report_update(self, decompressed_bytes):
+        pass
+
+    def report_end(self, processing_file_path, wrote_bytes):
+        self.pbar.update(1)
+
+    def report_warning(self, message):
+        logging.warning(f"py7zr: {message}")
+
+    def report_postprocess(self):
+        pass
+
 # Extract archive to destination directory
 def extract_archive(archive_path, dest_dir, format='zip'):
     if format == 'zip':
         with zipfile.ZipFile(archive_path, 'r') as zip_ref:
             total_files = len(zip_ref.namelist())
-            with tqdm(total=total_files, desc="Extracting Backup") as pbar:
+            with tqdm(total=total_files, desc="Extracting Backup", mininterval=0.25) as pbar:
                 for file in zip_ref.namelist():
                     zip_ref.extract(file, dest_dir)
                     pbar.update(1)
+    elif format == 'zst':
+        # ignore_zeros lets the reader continue past the end-of-archive marker
+        # into the registry sidecar frame appended by backup_registry
+        with pyzstd.ZstdFile(archive_path, 'r') as zstd_reader:
+            with tarfile.open(fileobj=zstd_reader, mode='r|', ignore_zeros=True) as tar:
+                tar.extractall(dest_dir)
     elif format == '7z':
         with py7zr.SevenZipFile(archive_path, 'r') as archive:
-            total_files = len(archive.getnames())
-            with tqdm(total=total_files, desc="Extracting Backup") as pbar:
-                archive.extractall(dest_dir)
-                pbar.update(1)
+            names = archive.getnames()
+        shard_names = [n for n in names if n.startswith('_shard_') and n.endswith('.7z')]
+        if shard_names:
+            # sharded archive produced by the py7zr fallback: unpack the
+            # stored shards, then extract each shard into the destination
+            with tempfile.TemporaryDirectory() as shard_dir:
+                with py7zr.SevenZipFile(archive_path, 'r') as archive:
+                    archive.extractall(shard_dir)
+                with tqdm(total=len(shard_names), unit='shard', desc="Extracting Backup", mininterval=0.25) as pbar:
+                    for shard in shard_names:
+                        with py7zr.SevenZipFile(os.path.join(shard_dir, shard), 'r') as shard_archive:
+                            shard_archive.extractall(dest_dir)
+                        pbar.update(1)
+                # non-shard members (e.g. the registry sidecar) land in the
+                # destination just like they would from a flat archive
+                for name in names:
+                    if name not in shard_names:
+                        extracted = os.path.join(shard_dir, name)
+                        if os.path.isfile(extracted):
+                            target = os.path.join(dest_dir, name)
+                            os.makedirs(os.path.dirname(target) or dest_dir, exist_ok=True)
+                            shutil.move(extracted, target)
+        else:
+            # one pass over the archive; per-member extract(targets=...) +
+            # reset() re-parses the whole archive per file and goes quadratic
+            with py7zr.SevenZipFile(archive_path, 'r') as archive:
+                with tqdm(total=len(names), desc="Extracting Backup", mininterval=0.25) as pbar:
+                    archive.extractall(dest_dir, callback=_ExtractProgress(pbar))
     else:
-        patoolib.extract_archive(archive_path, outdir=dest_dir, verbosity=1)
+        patoolib.extract_archive(archive_path, outdir=dest_dir, verbosity=0)
     logging.info(f"Extracted {archive_path} to {dest_dir} in {format} format")
 
 # Restore Plex registry entries from backup
-def restore_registry(backup_zip):
-    with zipfile.ZipFile(backup_zip, 'r') as zipf:
-        zipf.extract("plex_registry_backup.reg")
-    subprocess.run(["reg", "import", "plex_registry_backup.reg"], check=True)
-    os.remove("plex_registry_backup.reg")
+def restore_registry(backup_zip, format='zip'):
+    registry_backup_file = "plex_registry_backup.reg"
+    reg_bytes = None
+    if format == 'zst':
+        with pyzstd.ZstdFile(backup_zip, 'r') as zstd_reader:
+            with tarfile.open(fileobj=zstd_reader, mode='r|', ignore_zeros=True) as tar:
+                for member in tar:
+                    if member.name == registry_backup_file:
+                        reg_bytes = tar.extractfile(member).read()
+                        break
+    elif format == '7z':
+        # py7zr 1.x removed SevenZipFile.read(), so extract the member to a
+        # temp dir and read it from disk
+        with py7zr.SevenZipFile(backup_zip, 'r') as archive:
+            if registry_backup_file in archive.getnames():
+                with tempfile.TemporaryDirectory() as reg_dir:
+                    archive.extract(path=reg_dir, targets=[registry_backup_file])
+                    with open(os.path.join(reg_dir, registry_backup_file), 'rb') as f:
+                        reg_bytes = f.read()
+    else:
+        with zipfile.ZipFile(backup_zip, 'r') as zipf:
+            reg_bytes = zipf.read(registry_backup_file)
+    if reg_bytes is None:
+        raise FileNotFoundError(f"{registry_backup_file} not found in {backup_zip}")
+    tmp = tempfile.NamedTemporaryFile(suffix='.reg', delete=False)
+    try:
+        tmp.write(reg_bytes)
+        tmp.close()
+        subprocess.run(["reg", "import", tmp.name], check=True)
+    finally:
+        os.unlink(tmp.name)
     logging.info(f"Registry restored from {backup_zip}")
 
 # Main function
@@ -180,21 +595,49 @@ def main(mode='backup', config_path=None):
     if mode == 'backup':
         stop_plex_services()
         
-        compress_directory(plex_data_path, archive_path, format=archive_format, compression_level=compression_level, exclude_folders=exclude_folders)
-        backup_registry(archive_path)
+        # Build the archive under a .part name and publish it atomically so a
+        # crash never leaves a half-written backup that restore would pick
+        # up. The patoolib formats keep the real name because the backing
+        # tool infers its format from the extension.
+        if archive_format in ('zip', '7z', 'zst'):
+            tmp_archive = archive_path + '.part'
+        else:
+            tmp_archive = archive_path
+        try:
+            if archive_format == 'zip':
+                # One open/close cycle for the whole archive: compressed tree
+                # plus registry sidecar share the same handle
+                with zipfile.ZipFile(tmp_archive, 'w', zipfile.ZIP_STORED) as zfh:
+                    compress_directory(plex_data_path, tmp_archive, format=archive_format, compression_level=compression_level, exclude_folders=exclude_folders, zfh=zfh)
+                    backup_registry(tmp_archive, format=archive_format, zfh=zfh)
+            else:
+                compress_directory(plex_data_path, tmp_archive, format=archive_format, compression_level=compression_level, exclude_folders=exclude_folders)
+                backup_registry(tmp_archive, format=archive_format)
+        except BaseException:
+            if tmp_archive != archive_path and os.path.exists(tmp_archive):
+                os.remove(tmp_archive)
+            raise
+        if tmp_archive != archive_path:
+            os.replace(tmp_archive, archive_path)
         
         start_plex_services()
         
         print("Backup process completed.")
         logging.info("Backup process completed.")
     elif mode == 'restore':
-        latest_backup_archive = sorted([f for f in os.listdir(backup_dir) if f.endswith(f'.{archive_format}')])[-1]
-        latest_backup_archive_path = os.path.join(backup_dir, latest_backup_archive)
+        # Archive names embed a sortable timestamp, so the max name is the
+        # newest backup - one scandir pass, no sort, no intermediate list
+        with os.scandir(backup_dir) as it:
+            latest = max((e for e in it if e.is_file() and e.name.endswith(f'.{archive_format}')),
+                         key=lambda e: e.name, default=None)
+        if latest is None:
+            raise FileNotFoundError(f"No .{archive_format} backups found in {backup_dir}")
+        latest_backup_archive_path = latest.path
         
         stop_plex_services()
         
         extract_archive(latest_backup_archive_path, plex_data_path, format=archive_format)
-        restore_registry(latest_backup_archive_path)
+        restore_registry(latest_backup_archive_path, format=archive_format)
         
         start_plex_services()
         